@@ -2,28 +2,27 @@
 API endpoints for the lung cancer detection service
 """
 
-import time
-from datetime import datetime
 from typing import Dict, Any
-from fastapi import APIRouter, File, UploadFile, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from PIL import UnidentifiedImageError
 from fastapi.responses import JSONResponse
+from fastapi_cache.decorator import cache
 
 from app.core.config import settings
 from app.core.logging import get_logger
 from app.schemas.prediction import PredictionResponse, HealthResponse, ErrorResponse
-from app.services.image_processor import image_processor
+from app.services.image_processor import ImageProcessor, provide_image_processor
+from app.utils.clock import uptime_seconds, utc_timestamp
+from app.utils.uploads import stream_upload
 
 logger = get_logger(__name__)
 
 # Create router
 router = APIRouter()
 
-# Track service start time
-service_start_time = time.time()
-
 
 @router.get("/", response_model=Dict[str, str])
+@cache(expire=settings.RESPONSE_CACHE_TTL)
 async def root():
     """Root endpoint"""
     return {
@@ -33,13 +32,11 @@ async def root():
     }
 
 
-@router.get("/health", response_model=HealthResponse)
-async def health_check():
+# HEAD is accepted so readiness polls can skip the response body
+@router.api_route("/health", methods=["GET", "HEAD"], response_model=HealthResponse)
+async def health_check(image_processor: ImageProcessor = Depends(provide_image_processor)):
     """Comprehensive health check endpoint"""
     try:
-        current_time = datetime.utcnow()
-        uptime = time.time() - service_start_time
-        
         # Get image processor health status
         processor_health = image_processor.get_health_status()
         
@@ -47,8 +44,8 @@ async def health_check():
             status="healthy",
             service=settings.APP_NAME,
             version=settings.APP_VERSION,
-            timestamp=current_time.isoformat(),
-            uptime_seconds=uptime,
+            timestamp=utc_timestamp(),
+            uptime_seconds=uptime_seconds(),
             model_loaded=processor_health.get("model_loaded", False)
         )
         
@@ -60,13 +57,45 @@ async def health_check():
         )
 
 
-@router.post("/predict", response_model=PredictionResponse)
-async def predict_image(file: UploadFile = File(...)):
+# The upload is streamed from the raw request body, so the multipart schema
+# is declared here to keep the file field in the OpenAPI docs
+PREDICT_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {
+                        "file": {"type": "string", "format": "binary"}
+                    }
+                }
+            }
+        }
+    }
+}
+
+
+@router.post(
+    "/predict",
+    response_model=PredictionResponse,
+    openapi_extra=PREDICT_REQUEST_BODY
+)
+async def predict_image(
+    request: Request,
+    image_processor: ImageProcessor = Depends(provide_image_processor)
+):
     """
     Predict lung cancer from uploaded medical image
     
+    The multipart body is streamed into a spooled temporary file as it
+    arrives instead of being buffered in memory first.
+    
     Args:
-        file: Uploaded image file (JPEG, PNG, TIFF, BMP)
+        request: Multipart request with the image file (JPEG, PNG, TIFF, BMP)
+            in the ``file`` field
+        image_processor: Shared image processor
         
     Returns:
         Prediction results with confidence scores and image analysis
@@ -75,35 +104,35 @@ async def predict_image(file: UploadFile = File(...)):
         HTTPException: For various error conditions
     """
     
-    # Validate file
-    if not file.filename:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="No file provided"
-        )
-    
-    if not file.content_type:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Unable to determine file type"
-        )
-    
-    logger.info(f"Processing image: {file.filename} ({file.content_type})")
+    file = await stream_upload(request, field_name="file")
     
     try:
-        # Read file data
-        image_data = await file.read()
+        # Validate file
+        if not file.filename:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No file provided"
+            )
+        
+        if not file.content_type:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Unable to determine file type"
+            )
         
         # Explicitly handle empty uploads as bad request
-        if not image_data:
+        if not file.size:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Empty file provided"
             )
         
+        logger.info(f"Processing image: {file.filename} ({file.content_type})")
+        
         # Process image
-        result = image_processor.process_image(
-            image_data=image_data,
+        result = await image_processor.process_image(
+            image_file=file.file,
+            file_size=file.size,
             filename=file.filename,
             content_type=file.content_type
         )
@@ -111,6 +140,9 @@ async def predict_image(file: UploadFile = File(...)):
         logger.info(f"Successfully processed {file.filename}")
         
         return PredictionResponse(**result)
+    
+    except HTTPException:
+        raise
         
     except ValueError as e:
         logger.warning(f"Invalid image file {file.filename}: {e}")
@@ -139,10 +171,14 @@ async def predict_image(file: UploadFile = File(...)):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error during image processing"
         )
+    
+    finally:
+        file.close()
 
 
 @router.get("/model/info")
-async def get_model_info():
+@cache(expire=settings.RESPONSE_CACHE_TTL)
+async def get_model_info(image_processor: ImageProcessor = Depends(provide_image_processor)):
     """Get information about the loaded model"""
     try:
         health_status = image_processor.get_health_status()
@@ -2,9 +2,10 @@
 Core configuration settings for the FastAPI Lung Cancer Detection service
 """
 
-from typing import Optional, List
+from typing import Any, FrozenSet, Optional, List, Tuple
 from pydantic_settings import BaseSettings
-from pydantic import field_validator
+from pydantic import PrivateAttr, field_validator
+from PIL import Image
 import os
 
 
@@ -29,11 +30,20 @@ class Settings(BaseSettings):
     # File Upload
     MAX_FILE_SIZE: int = 50 * 1024 * 1024  # 50MB
     ALLOWED_IMAGE_TYPES: str = "image/jpeg,image/png,image/tiff,image/bmp"  # Will be parsed
+    MAX_IMAGE_PIXELS: int = 50_000_000  # Decompression bomb limit (width * height)
     
     # Model Settings (Docker and local compatible)
     MODEL_PATH: str = "./models/lung_cancer_model.h5"
+    MODEL_BACKEND: str = "keras"  # "keras" or "onnx"
+    ONNX_MODEL_PATH: str = "./models/lung_cancer_model.onnx"
+    ONNX_PROVIDERS: str = "CPUExecutionProvider"  # Comma-separated, in priority order
+    ONNX_INTRA_OP_THREADS: int = 0  # 0 = let onnxruntime decide
     MODEL_INPUT_SIZE: str = "256,256"  # Default input size as string
     CONFIDENCE_THRESHOLD: float = 0.5
+    INFERENCE_WORKERS: int = 0  # Threads for decode/inference, 0 = CPU count
+    MAX_BATCH_SIZE: int = 8  # Max concurrent requests per model call
+    MAX_BATCH_WAIT_MS: float = 10.0  # Time to wait for a batch to fill
+    MODEL_ENABLE_XLA: bool = False  # Enable TensorFlow XLA JIT compilation
     
     # Logging
     LOG_LEVEL: str = "INFO"
@@ -45,6 +55,9 @@ class Settings(BaseSettings):
     # Health Check
     HEALTH_CHECK_INTERVAL: int = 30
     
+    # Response caching for "/" and "/model/info" (seconds)
+    RESPONSE_CACHE_TTL: int = 30
+    
     @field_validator("DEBUG", mode="before")
     @classmethod
     def parse_debug(cls, value):
@@ -52,7 +65,34 @@ class Settings(BaseSettings):
             return value.lower() in ("true", "1", "on", "yes")
         return value
     
-    def get_model_input_size(self) -> tuple:
+    @field_validator("MODEL_BACKEND")
+    @classmethod
+    def parse_model_backend(cls, value):
+        value = value.strip().lower()
+        if value not in ("keras", "onnx"):
+            raise ValueError("MODEL_BACKEND must be 'keras' or 'onnx'")
+        return value
+    
+    # Parsed values, computed once in model_post_init
+    _model_input_size: Tuple[int, int] = PrivateAttr()
+    _allowed_origins: List[str] = PrivateAttr()
+    _allowed_image_types: FrozenSet[str] = PrivateAttr()
+    _image_formats: Tuple[str, ...] = PrivateAttr()
+    _model_path: str = PrivateAttr()
+    _onnx_model_path: str = PrivateAttr()
+    
+    def model_post_init(self, __context: Any) -> None:
+        """Parse string settings once instead of on every request"""
+        self._model_input_size = self._parse_model_input_size()
+        self._allowed_origins = self._parse_allowed_origins()
+        self._allowed_image_types = frozenset(
+            img_type.strip() for img_type in self.ALLOWED_IMAGE_TYPES.split(",") if img_type.strip()
+        )
+        self._image_formats = self._parse_image_formats()
+        self._model_path = self._resolve_path(self.MODEL_PATH)
+        self._onnx_model_path = self._resolve_path(self.ONNX_MODEL_PATH)
+    
+    def _parse_model_input_size(self) -> Tuple[int, int]:
         """Parse model input size from string to tuple"""
         try:
             width, height = self.MODEL_INPUT_SIZE.split(",")
@@ -60,23 +100,55 @@ class Settings(BaseSettings):
         except:
             return (224, 224)  # default
     
-    def get_allowed_origins(self) -> List[str]:
+    def _parse_allowed_origins(self) -> List[str]:
         """Parse allowed origins from string to list"""
         if self.ALLOWED_ORIGINS == "*":
             return ["*"]
         return [origin.strip() for origin in self.ALLOWED_ORIGINS.split(",")]
     
-    def get_allowed_image_types(self) -> List[str]:
-        """Parse allowed image types from string to list"""
-        return [img_type.strip() for img_type in self.ALLOWED_IMAGE_TYPES.split(",")]
+    def _parse_image_formats(self) -> Tuple[str, ...]:
+        """Map the allowed MIME types to the PIL decoders that handle them"""
+        Image.init()
+        return tuple(sorted(
+            pil_format for pil_format, mime in Image.MIME.items()
+            if mime in self._allowed_image_types
+        ))
     
-    def get_model_path(self) -> str:
-        """Get absolute model path that works in both local and Docker environments"""
-        import os
-        if os.path.isabs(self.MODEL_PATH):
-            return self.MODEL_PATH
+    @staticmethod
+    def _resolve_path(path: str) -> str:
+        """Get absolute path that works in both local and Docker environments"""
+        if os.path.isabs(path):
+            return path
         # Convert relative path to absolute, works in both environments
-        return os.path.abspath(self.MODEL_PATH)
+        return os.path.abspath(path)
+    
+    def get_model_input_size(self) -> Tuple[int, int]:
+        """Get model input size as a (width, height) tuple"""
+        return self._model_input_size
+    
+    def get_allowed_origins(self) -> List[str]:
+        """Get allowed CORS origins as a list"""
+        return self._allowed_origins
+    
+    def get_allowed_image_types(self) -> FrozenSet[str]:
+        """Get allowed image MIME types as a set for O(1) membership checks"""
+        return self._allowed_image_types
+    
+    def get_image_formats(self) -> Tuple[str, ...]:
+        """Get the PIL formats matching ALLOWED_IMAGE_TYPES, for Image.open(formats=...)"""
+        return self._image_formats
+    
+    def get_model_path(self) -> str:
+        """Get absolute model path resolved at startup"""
+        return self._model_path
+    
+    def get_onnx_model_path(self) -> str:
+        """Get absolute ONNX model path resolved at startup"""
+        return self._onnx_model_path
+    
+    def get_onnx_providers(self) -> List[str]:
+        """Parse onnxruntime execution providers from string to list"""
+        return [provider.strip() for provider in self.ONNX_PROVIDERS.split(",") if provider.strip()]
     
     class Config:
         env_file = ".env"
@@ -2,16 +2,25 @@
 FastAPI Lung Cancer Detection Microservice
 """
 
+import asyncio
+import logging
+import os
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.exceptions import RequestValidationError
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
 import uvicorn
 
 from app.core.config import settings
 from app.core.logging import setup_logging, get_logger
 from app.api.v1.endpoints import router as api_router
+from app.services.image_processor import get_image_processor
+from app.utils.clock import start_clock, stop_clock
 
 # Setup logging
 setup_logging()
@@ -22,6 +31,7 @@ app = FastAPI(
     title=settings.APP_NAME,
     description=settings.APP_DESCRIPTION,
     version=settings.APP_VERSION,
+    default_response_class=ORJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json"
@@ -37,17 +47,25 @@ app.add_middleware(
 )
 
 
+# Paths polled by liveness/readiness probes are not logged
+UNLOGGED_PATH_PREFIXES = ("/health",)
+
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    """Log all incoming requests"""
-    start_time = time.time()
+    """Log incoming requests, skipping health probes"""
+    path = request.scope["path"]
+    if path.startswith(UNLOGGED_PATH_PREFIXES) or not logger.isEnabledFor(logging.INFO):
+        return await call_next(request)
     
-    logger.info(f"Request: {request.method} {request.url}")
+    start_time = time.perf_counter()
+    
+    logger.info("Request: %s %s", request.method, path)
     
     response = await call_next(request)
     
-    process_time = time.time() - start_time
-    logger.info(f"Response: {response.status_code} - {process_time:.3f}s")
+    process_time = time.perf_counter() - start_time
+    logger.info("Response: %s - %.3fs", response.status_code, process_time)
     
     return response
 
@@ -57,7 +75,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     """Handle validation errors"""
     logger.warning(f"Validation error for {request.url}: {exc}")
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=422,
         content={
             "status": "error",
@@ -73,7 +91,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     """Handle HTTP exceptions"""
     logger.error(f"HTTP error {exc.status_code} for {request.url}: {exc.detail}")
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "status": "error",
@@ -88,7 +106,7 @@ async def general_exception_handler(request: Request, exc: Exception):
     """Handle unexpected exceptions"""
     logger.error(f"Unexpected error for {request.url}: {exc}", exc_info=True)
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "status": "error",
@@ -105,9 +123,27 @@ async def startup_event():
     logger.info(f"Debug mode: {settings.DEBUG}")
     logger.info(f"CORS origins: {settings.get_allowed_origins()}")
     
-    # Check model status
-    from app.services.image_processor import image_processor
+    # Bound the threads used for image decode and inference so requests queue
+    # instead of piling up on the GIL
+    max_workers = settings.INFERENCE_WORKERS or os.cpu_count() or 1
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+    )
+    logger.info(f"Inference workers: {max_workers}")
+    
+    # Keep the cached response timestamp fresh
+    start_clock()
+    
+    # In-memory cache for the static "/" and "/model/info" responses
+    FastAPICache.init(InMemoryBackend(), prefix="lung-cancer-api")
+    
+    # Load the model off the event loop, then check its status
+    image_processor = get_image_processor()
+    await asyncio.to_thread(image_processor.load)
+    image_processor.batch_queue.start()
+    
     if image_processor.model_loaded:
+        await asyncio.to_thread(image_processor.warmup)
         logger.info("✅ Model loaded successfully and ready for predictions")
     else:
         logger.error("❌ Model failed to load - predictions will not work")
@@ -117,19 +153,48 @@ async def startup_event():
 async def shutdown_event():
     """Application shutdown event"""
     logger.info("Shutting down Lung Cancer Detection API")
+    
+    await get_image_processor().batch_queue.stop()
+    await stop_clock()
 
 
 # Include API routes
 app.include_router(api_router, prefix="", tags=["Lung Cancer Detection"])
 
 
+def install_event_loop_policy() -> str:
+    """Install the fastest available event loop policy and return its name"""
+    if sys.platform == "linux":
+        try:
+            import uringcore
+            asyncio.set_event_loop_policy(uringcore.EventLoopPolicy())
+            return "uringcore"
+        except (ImportError, AttributeError):
+            pass
+    
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        return "uvloop"
+    except ImportError:
+        return "asyncio"
+
+
 if __name__ == "__main__":
-    import time
+    if settings.DEBUG:
+        # The reloader serves from a fresh child process that never runs the policy
+        # install below, so let uvicorn pick uvloop there itself
+        loop = "auto"
+    else:
+        logger.info(f"Event loop: {install_event_loop_policy()}")
+        # Keep the policy installed above instead of letting uvicorn pick one
+        loop = "none"
     
     uvicorn.run(
         "app.main:app",
         host=settings.HOST,
         port=settings.PORT,
         reload=settings.DEBUG,
+        loop=loop,
         log_level=settings.LOG_LEVEL.lower()
     )
\ No newline at end of file
@@ -18,7 +18,7 @@ class ImageStats(BaseModel):
     """Image statistics schema"""
     mean_intensity: float = Field(..., description="Mean pixel intensity")
     std_intensity: float = Field(..., description="Standard deviation of pixel intensity")
-    shape: List[int] = Field(..., description="Image shape as [height, width, channels]")
+    shape: List[int] = Field(..., description="Shape of the preprocessed model input as [height, width]")
     size_bytes: Optional[int] = Field(None, description="File size in bytes")
 
 
@@ -0,0 +1,123 @@
+"""
+Micro-batching queue that groups concurrent predictions into a single model call
+"""
+
+import asyncio
+from typing import Callable, List, Optional, Tuple
+import numpy as np
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class AsyncBatchQueue:
+    """Collect preprocessed inputs from concurrent requests and predict them as one batch"""
+
+    def __init__(
+        self,
+        predict_fn: Callable[[np.ndarray], np.ndarray],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0
+    ):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the background batching task is active"""
+        return self._worker is not None and not self._worker.done()
+
+    def start(self) -> None:
+        """Start the background batching task on the running event loop"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+        logger.info(
+            f"Batch queue started (max_batch_size={self.max_batch_size}, "
+            f"max_wait_ms={self.max_wait * 1000:.1f})"
+        )
+
+    async def stop(self) -> None:
+        """Stop the batching task and fail any requests still waiting"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                if not future.done():
+                    future.set_exception(RuntimeError("Batch queue stopped"))
+            self._queue = None
+
+    async def submit(self, model_input: np.ndarray) -> np.ndarray:
+        """
+        Queue one preprocessed input and wait for its prediction
+
+        Args:
+            model_input: Preprocessed input with a leading batch dimension of 1
+
+        Returns:
+            The model output row for this input
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((model_input, future))
+        return await future
+
+    async def _collect(self, items: List[Tuple[np.ndarray, asyncio.Future]]) -> None:
+        """Wait for one item, then gather more until the batch is full or the window closes"""
+        loop = asyncio.get_running_loop()
+        items.append(await self._queue.get())
+        deadline = loop.time() + self.max_wait
+
+        while len(items) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+    async def _run(self) -> None:
+        """Background task that runs batched predictions"""
+        items: List[Tuple[np.ndarray, asyncio.Future]] = []
+        try:
+            while True:
+                items = []
+                await self._collect(items)
+
+                # Skip requests whose callers have gone away
+                items = [(x, future) for x, future in items if not future.done()]
+                if not items:
+                    continue
+
+                try:
+                    batch = np.concatenate([x for x, _ in items], axis=0)
+                    outputs = await asyncio.to_thread(self.predict_fn, batch)
+                except Exception as e:
+                    logger.error(f"Batch prediction failed ({len(items)} items): {e}")
+                    for _, future in items:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+
+                for row, (_, future) in zip(outputs, items):
+                    if not future.done():
+                        future.set_result(row)
+
+        except asyncio.CancelledError:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(RuntimeError("Batch queue stopped"))
+            raise
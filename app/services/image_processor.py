@@ -2,51 +2,120 @@
 Image processing service for lung cancer detection
 """
 
+import asyncio
 import time
-from typing import Dict, Any, Tuple, Optional
+from functools import lru_cache
+from typing import Dict, Any, Tuple, Optional, BinaryIO
 import numpy as np
 from PIL import Image
-import io
-from datetime import datetime
 
 from app.core.config import settings
 from app.core.logging import get_logger
 from app.schemas.prediction import ImageInfo, ImageStats, PredictionResult
+from app.services.batch_queue import AsyncBatchQueue
+from app.utils.clock import utc_timestamp
 
 logger = get_logger(__name__)
 
+# Refuse to decode images whose pixel count could exhaust worker memory
+Image.MAX_IMAGE_PIXELS = settings.MAX_IMAGE_PIXELS
+
 
 class ImageProcessor:
     """Image processing and prediction service"""
     
     def __init__(self):
         self.model = None
+        self.session = None
+        self._input_name = None
+        self._infer_single = None
+        self._infer_batch = None
         self.model_loaded = False
-        self._load_model()
+        self.batch_queue = AsyncBatchQueue(
+            self.predict_batch,
+            max_batch_size=settings.MAX_BATCH_SIZE,
+            max_wait_ms=settings.MAX_BATCH_WAIT_MS
+        )
+        self._refresh_health_cache()
     
-    def _load_model(self):
-        """Load the machine learning model"""
+    def load(self):
+        """Load the machine learning model for the configured backend"""
         try:
-            import keras
-            
-            # Load the model using tensorflow.keras
-            model_path = settings.get_model_path()
-            self.model = keras.models.load_model(model_path)
+            if settings.MODEL_BACKEND == "onnx":
+                self._load_onnx_model()
+            else:
+                self._load_keras_model()
             self.model_loaded = True
+            logger.info(f"Loaded {settings.MODEL_BACKEND} model")
             
         except Exception as e:
             logger.error(f"Failed to load model: {e}")
             self.model_loaded = False
+        
+        self._refresh_health_cache()
     
-    def validate_image(self, content_type: str, file_size: int) -> bool:
-        """Validate uploaded image"""
-        if not content_type or content_type not in settings.get_allowed_image_types():
-            return False
+    def _load_keras_model(self):
+        """Load the Keras model"""
+        import keras
+        import tensorflow as tf
+        
+        if settings.MODEL_ENABLE_XLA:
+            tf.config.optimizer.set_jit(True)
         
-        if file_size > settings.MAX_FILE_SIZE:
-            return False
+        # Load the model using tensorflow.keras
+        model_path = settings.get_model_path()
+        self.model = keras.models.load_model(model_path)
         
-        return True
+        # Call the model directly through traced graphs instead of model.predict, which
+        # sets up its data pipeline and callbacks on every call: one specialized for
+        # single images and one for micro-batches of any size
+        model = self.model
+        width, height = settings.get_model_input_size()
+        self._infer_single = tf.function(
+            lambda x: model(x, training=False),
+            input_signature=[tf.TensorSpec((1, height, width), tf.float32)]
+        )
+        self._infer_batch = tf.function(
+            lambda x: model(x, training=False),
+            input_signature=[tf.TensorSpec((None, height, width), tf.float32)]
+        )
+    
+    def _load_onnx_model(self):
+        """Load the ONNX model (see convert_model.py) into an onnxruntime session"""
+        import onnxruntime as ort
+        
+        sess_options = ort.SessionOptions()
+        sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if settings.ONNX_INTRA_OP_THREADS:
+            sess_options.intra_op_num_threads = settings.ONNX_INTRA_OP_THREADS
+        
+        self.session = ort.InferenceSession(
+            settings.get_onnx_model_path(),
+            sess_options=sess_options,
+            providers=settings.get_onnx_providers()
+        )
+        self._input_name = self.session.get_inputs()[0].name
+    
+    def warmup(self):
+        """Run dummy forward passes so graph tracing and autotuning happen before the first request"""
+        if not self.model_loaded:
+            return
+        
+        width, height = settings.get_model_input_size()
+        batch_sizes = sorted({1, settings.MAX_BATCH_SIZE})
+        
+        start_time = time.time()
+        try:
+            for batch_size in batch_sizes:
+                self.predict_batch(np.zeros((batch_size, height, width), dtype=np.float32))
+            logger.info(f"Model warmed up for batch sizes {batch_sizes} in {time.time() - start_time:.2f}s")
+        except Exception as e:
+            logger.warning(f"Model warmup failed: {e}")
+    
+    def validate_image(self, content_type: str, file_size: int) -> bool:
+        """Validate uploaded image"""
+        # Allowed types are a frozenset parsed once at startup, so this is an O(1) lookup
+        return content_type in settings.get_allowed_image_types() and file_size <= settings.MAX_FILE_SIZE
     
     def extract_image_info(self, image: Image.Image, file_size: Optional[int] = None) -> ImageInfo:
         """Extract basic image information"""
@@ -61,10 +130,17 @@ class ImageProcessor:
             format=format_name
         )
     
-    def calculate_image_stats(self, image_array: np.ndarray, file_size: Optional[int] = None) -> ImageStats:
-        """Calculate image statistics"""
-        mean_intensity = float(np.mean(image_array))
-        std_intensity = float(np.std(image_array))
+    def calculate_image_stats(self, image_array: np.ndarray, file_size: Optional[int] = None, scale: float = 1.0) -> ImageStats:
+        """Calculate image statistics, with intensities multiplied by ``scale``"""
+        # Sum and sum of squares (accumulated in float64) give mean and std
+        # without the mean-subtracted temporary array np.std allocates
+        pixels = image_array.reshape(-1)
+        count = max(pixels.size, 1)
+        mean = float(pixels.sum(dtype=np.float64)) / count
+        mean_sq = float(np.einsum('i,i->', pixels, pixels, dtype=np.float64)) / count
+        
+        mean_intensity = mean * scale
+        std_intensity = float(np.sqrt(max(mean_sq - mean * mean, 0.0))) * scale
         shape = list(image_array.shape)
         
         return ImageStats(
@@ -76,120 +152,179 @@ class ImageProcessor:
     
     def preprocess_image(self, image: Image.Image) -> np.ndarray:
         """Preprocess image for model prediction"""
+        target_size = settings.get_model_input_size()
+        
+        # Let libjpeg decode straight to grayscale at a reduced scale (no-op for other formats)
+        image.draft('L', target_size)
+        
+        # Resize before converting RGB so the conversion only touches target-size pixels;
+        # other modes (palette, 16-bit, ...) are converted first
+        if image.mode not in ('L', 'RGB'):
+            image = image.convert('L')
+        
+        # Resize to model input size
+        image = image.resize(target_size, Image.Resampling.BILINEAR)
+        
         # Convert from RGB to B&W if necessary
         if image.mode != 'L':
             image = image.convert('L')
         
-        # Resize to model input size
-        target_size = settings.get_model_input_size()
-        image = image.resize(target_size, Image.Resampling.LANCZOS)
+        # Normalize pixel values (0-1) straight into a buffer that already has the batch dimension
+        width, height = target_size
+        image_array = np.empty((1, height, width), dtype=np.float32)
+        np.divide(np.asarray(image, dtype=np.uint8), np.float32(255.0), out=image_array[0])
         
-        # Convert to numpy array
-        image_array = np.array(image, dtype=np.float32)
+        return image_array
+    
+    def predict_batch(self, batch: np.ndarray) -> np.ndarray:
+        """Run the model on a batch of preprocessed images and return class probabilities"""
+        if not self.model_loaded:
+            raise RuntimeError("Model not loaded")
+        
+        # Get model predictions (softmax probabilities)
+        if self.session is not None:
+            return self.session.run(None, {self._input_name: batch})[0]
+        if self._infer_batch is not None:
+            infer = self._infer_single if batch.shape[0] == 1 else self._infer_batch
+            return infer(batch).numpy()
+        return self.model.predict(batch)
+    
+    def format_prediction(self, class_probs: np.ndarray, start_time: float) -> Dict[str, Any]:
+        """Turn the class probabilities of a single image into a prediction result"""
+        # Get the predicted class index (highest probability)
+        predicted_class_idx = np.argmax(class_probs)
         
-        # Normalize pixel values (0-1)
-        image_array = image_array / 255.0
+        # Get confidence (highest probability value)
+        confidence = float(np.max(class_probs))
         
-        # Add batch dimension
-        image_array = np.expand_dims(image_array, axis=0)
+        # Map the predicted class index to the corresponding label
+        class_labels = ["Benign Case", "Malignant Case", "Normal Case"]
+        prediction_class = class_labels[predicted_class_idx]
         
-        return image_array
+        # Create probabilities dictionary
+        probabilities = {
+            "Benign Case": float(class_probs[0]),
+            "Malignant Case": float(class_probs[1]),
+            "Normal Case": float(class_probs[2])
+        }
+        
+        processing_time = (time.time() - start_time) * 1000  # Convert to milliseconds
+        
+        return {
+            "prediction": prediction_class,
+            "confidence": confidence,
+            "probabilities": probabilities,
+            "processing_time_ms": processing_time
+        }
     
     def predict(self, preprocessed_image: np.ndarray) -> Dict[str, Any]:
         """Make prediction using the loaded model"""
         start_time = time.time()
         
         try:
-            if not self.model_loaded:
-                raise RuntimeError("Model not loaded")
-
-            # Get model predictions (softmax probabilities)
-            predictions = self.model.predict(preprocessed_image)
-            
-            # Extract probabilities for each class
-            class_probs = predictions[0]  # Get probabilities for the single image
-            
-            # Get the predicted class index (highest probability)
-            predicted_class_idx = np.argmax(class_probs)
-            
-            # Get confidence (highest probability value)
-            confidence = float(np.max(class_probs))
-            
-            # Map the predicted class index to the corresponding label
-            class_labels = ["Benign Case", "Malignant Case", "Normal Case"]
-            prediction_class = class_labels[predicted_class_idx]
+            predictions = self.predict_batch(preprocessed_image)
             
-            # Create probabilities dictionary
-            probabilities = {
-                "Benign Case": float(class_probs[0]),
-                "Malignant Case": float(class_probs[1]),
-                "Normal Case": float(class_probs[2])
-            }
-            
-            processing_time = (time.time() - start_time) * 1000  # Convert to milliseconds
-            
-            return {
-                "prediction": prediction_class,
-                "confidence": confidence,
-                "probabilities": probabilities,
-                "processing_time_ms": processing_time
-            }
+            # Get probabilities for the single image
+            return self.format_prediction(predictions[0], start_time)
             
         except Exception as e:
             logger.error(f"Prediction failed: {e}")
             raise
     
-    def process_image(self, image_data: bytes, filename: str, content_type: str) -> Dict[str, Any]:
-        """Complete image processing pipeline"""
-        file_size = len(image_data)
+    async def process_image(self, image_file: BinaryIO, file_size: int, filename: str, content_type: str) -> Dict[str, Any]:
+        """
+        Complete image processing pipeline
         
+        Decoding and preprocessing run in a worker thread to keep the event loop
+        free; the prediction itself goes through the micro-batching queue.
+        """
+        image_info, image_stats, preprocessed_image = await asyncio.to_thread(
+            self._prepare_image, image_file, file_size, content_type
+        )
+        
+        start_time = time.time()
+        
+        try:
+            # Make prediction, batched with other concurrent requests
+            class_probs = await self.batch_queue.submit(preprocessed_image)
+            prediction_results = self.format_prediction(class_probs, start_time)
+            
+        except Exception as e:
+            logger.error(f"Prediction failed: {e}")
+            raise
+        
+        # Create prediction result
+        prediction_result = PredictionResult(**prediction_results)
+        
+        return {
+            "status": "success",
+            "filename": filename,
+            "image_info": image_info,
+            "image_stats": image_stats,
+            "prediction_result": prediction_result,
+            "message": "Image processed successfully",
+            "timestamp": utc_timestamp()
+        }
+    
+    def _prepare_image(self, image_file: BinaryIO, file_size: int, content_type: str) -> Tuple[ImageInfo, ImageStats, np.ndarray]:
+        """Validate, decode and preprocess an uploaded image"""
         # Validate image
         if not self.validate_image(content_type, file_size):
             raise ValueError("Invalid image file")
         
         try:
-            # Load image
-            image = Image.open(io.BytesIO(image_data))
+            # Load image straight from the uploaded file object
+            try:
+                # Only the decoders for allowed types are tried, so other plugins' sniffers are skipped
+                image = Image.open(image_file, formats=settings.get_image_formats())
+            except Image.DecompressionBombError as e:
+                raise ValueError(f"Image too large: {e}")
+            
+            # PIL only raises above twice the limit (and warns below it), so enforce it exactly
+            width, height = image.size
+            if width * height > settings.MAX_IMAGE_PIXELS:
+                raise ValueError(
+                    f"Image too large: {width}x{height} exceeds {settings.MAX_IMAGE_PIXELS} pixels"
+                )
             
             # Extract image info
             image_info = self.extract_image_info(image, file_size)
             
-            # Convert to numpy array for stats
-            image_array = np.array(image)
-            image_stats = self.calculate_image_stats(image_array, file_size)
-            
             # Preprocess for prediction
             preprocessed_image = self.preprocess_image(image)
             
-            # Make prediction
-            prediction_results = self.predict(preprocessed_image)
+            # Stats come from the resized grayscale model input (rescaled to 0-255)
+            # rather than a full-resolution copy of the decoded image
+            image_stats = self.calculate_image_stats(preprocessed_image[0], file_size, scale=255.0)
             
-            # Create prediction result
-            prediction_result = PredictionResult(**prediction_results)
-            
-            return {
-                "status": "success",
-                "filename": filename,
-                "image_info": image_info,
-                "image_stats": image_stats,
-                "prediction_result": prediction_result,
-                "message": "Image processed successfully",
-                "timestamp": datetime.utcnow().isoformat()
-            }
+            return image_info, image_stats, preprocessed_image
             
         except Exception as e:
             logger.error(f"Image processing failed: {e}")
             raise
     
-    def get_health_status(self) -> Dict[str, Any]:
-        """Get health status of the image processor"""
-        return {
+    def _refresh_health_cache(self):
+        """Build the health status once; it only changes when the model is (re)loaded"""
+        self._health_cache = {
             "model_loaded": self.model_loaded,
-            "supported_formats": settings.get_allowed_image_types(),
+            "supported_formats": sorted(settings.get_allowed_image_types()),
             "max_file_size_mb": settings.MAX_FILE_SIZE / (1024 * 1024),
             "model_input_size": settings.get_model_input_size()
         }
+    
+    def get_health_status(self) -> Dict[str, Any]:
+        """Get health status of the image processor"""
+        if self._health_cache["model_loaded"] != self.model_loaded:
+            self._refresh_health_cache()
+        return self._health_cache
+
+
+@lru_cache(maxsize=1)
+def get_image_processor() -> ImageProcessor:
+    """Get the shared image processor; the model is loaded separately via load()"""
+    return ImageProcessor()
 
 
-# Global instance
-image_processor = ImageProcessor()
\ No newline at end of file
+async def provide_image_processor() -> ImageProcessor:
+    """FastAPI dependency for the shared image processor; async so it skips the threadpool"""
+    return get_image_processor()
@@ -0,0 +1,59 @@
+"""
+Cached timestamps and monotonic uptime for request handlers
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Optional
+
+# Refresh interval of the cached timestamp, matching its one-second precision
+TICK_INTERVAL = 1.0
+
+_start_monotonic = time.monotonic()
+_cached_timestamp: Optional[str] = None
+_ticker: Optional[asyncio.Task] = None
+
+
+def _format_now() -> str:
+    return datetime.utcnow().isoformat(timespec="seconds")
+
+
+def utc_timestamp() -> str:
+    """Current UTC time as an ISO 8601 string with one-second precision"""
+    if _cached_timestamp is None:
+        return _format_now()
+    return _cached_timestamp
+
+
+def uptime_seconds() -> float:
+    """Seconds since the service started, unaffected by wall-clock jumps"""
+    return time.monotonic() - _start_monotonic
+
+
+async def _tick() -> None:
+    """Refresh the cached timestamp once per interval"""
+    global _cached_timestamp
+    while True:
+        _cached_timestamp = _format_now()
+        await asyncio.sleep(TICK_INTERVAL)
+
+
+def start_clock() -> None:
+    """Start the background task that keeps the cached timestamp fresh"""
+    global _ticker
+    if _ticker is None or _ticker.done():
+        _ticker = asyncio.create_task(_tick())
+
+
+async def stop_clock() -> None:
+    """Stop the background task and fall back to computing timestamps on demand"""
+    global _ticker, _cached_timestamp
+    if _ticker is not None:
+        _ticker.cancel()
+        try:
+            await _ticker
+        except asyncio.CancelledError:
+            pass
+        _ticker = None
+    _cached_timestamp = None
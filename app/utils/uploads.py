@@ -0,0 +1,207 @@
+"""
+Streaming multipart upload handling for the prediction endpoint
+"""
+
+from tempfile import SpooledTemporaryFile
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+
+from app.core.config import settings
+
+# Uploads larger than this roll over from memory to a temporary file on disk
+SPOOL_MAX_SIZE = 2 * 1024 * 1024
+
+# Allowance for multipart boundaries and part headers when comparing the
+# request Content-Length against MAX_FILE_SIZE
+MULTIPART_OVERHEAD = 16 * 1024
+
+
+class StreamedUpload:
+    """Single file part received from a streamed multipart request body"""
+
+    def __init__(self, field_name: str):
+        self.field_name = field_name
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self.file = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        self.size = 0
+
+    @property
+    def in_memory(self) -> bool:
+        """Whether the upload is still buffered in memory rather than spilled to disk"""
+        return not getattr(self.file, "_rolled", True)
+
+    async def write(self, data: bytes) -> None:
+        """Append data, moving the write off the event loop once the file is on disk"""
+        if self.in_memory:
+            self.file.write(data)
+        else:
+            await run_in_threadpool(self.file.write, data)
+
+    def close(self) -> None:
+        """Release the spooled file"""
+        self.file.close()
+
+
+class _UploadParser:
+    """Collects the requested file field from python-multipart parser callbacks"""
+
+    def __init__(self, field_name: str, max_size: int):
+        self.field_name = field_name
+        self.max_size = max_size
+        self.upload: Optional[StreamedUpload] = None
+        self._headers: List[Tuple[bytes, bytes]] = []
+        # bytearrays so headers split across many chunks are appended in place
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+        self._in_upload = False
+        self.pending: List[bytes] = []
+
+    def on_part_begin(self) -> None:
+        self._headers = []
+        self._in_upload = False
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+        self._check_header_size()
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+        self._check_header_size()
+
+    def _check_header_size(self) -> None:
+        # Part headers are scanned byte by byte on the event loop; stop oversized ones early
+        if len(self._header_field) + len(self._header_value) > MULTIPART_OVERHEAD:
+            raise MultipartParseError("Part header too large")
+
+    def on_header_end(self) -> None:
+        self._headers.append((bytes(self._header_field).lower(), bytes(self._header_value)))
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+
+    def on_headers_finished(self) -> None:
+        headers = dict(self._headers)
+        _, options = parse_options_header(headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("latin-1")
+        if name != self.field_name or b"filename" not in options or self.upload:
+            return
+
+        self.upload = StreamedUpload(name)
+        self.upload.filename = options[b"filename"].decode("utf-8", "replace")
+        content_type = headers.get(b"content-type", b"").decode("latin-1").strip()
+        self.upload.content_type = content_type or None
+        self._in_upload = True
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if not self._in_upload:
+            return
+        self.upload.size += end - start
+        if self.upload.size <= self.max_size:
+            # Written from stream_upload, where the write can be awaited
+            self.pending.append(data[start:end])
+
+    def on_part_end(self) -> None:
+        self._in_upload = False
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+
+def _file_too_large_error() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File too large (max {settings.MAX_FILE_SIZE} bytes)"
+    )
+
+
+def _missing_file_error(field_name: str) -> RequestValidationError:
+    """Build the same validation error FastAPI raises for a missing File(...) field"""
+    return RequestValidationError([{
+        "type": "missing",
+        "loc": ("body", field_name),
+        "msg": "Field required",
+        "input": None
+    }])
+
+
+async def stream_upload(request: Request, field_name: str = "file") -> StreamedUpload:
+    """
+    Stream a multipart request body into a spooled temporary file
+
+    Only the part named ``field_name`` is kept; other form fields are skipped.
+    Requests whose Content-Length is already too large are rejected with 413
+    without reading the body, and streamed uploads are aborted with 413 as
+    soon as the file exceeds ``MAX_FILE_SIZE`` or the whole body (including
+    other fields and part headers) exceeds it plus ``MULTIPART_OVERHEAD``.
+
+    Args:
+        request: Incoming request with a multipart/form-data body
+        field_name: Name of the form field holding the file
+
+    Returns:
+        The received upload, rewound to the start of the file
+
+    Raises:
+        HTTPException: If the upload is too large or the body is malformed
+        RequestValidationError: If the body holds no file under ``field_name``
+    """
+    max_body_size = settings.MAX_FILE_SIZE + MULTIPART_OVERHEAD
+
+    # Reject oversized uploads up front, before reading any of the body
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit():
+        if int(content_length) > max_body_size:
+            raise _file_too_large_error()
+
+    _, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if not boundary:
+        raise _missing_file_error(field_name)
+
+    collector = _UploadParser(field_name, settings.MAX_FILE_SIZE)
+    parser = MultipartParser(boundary, collector.callbacks())
+    body_size = 0
+
+    try:
+        async for chunk in request.stream():
+            # Chunked bodies have no Content-Length, so bound the whole body as it arrives
+            body_size += len(chunk)
+            if body_size > max_body_size:
+                raise _file_too_large_error()
+            parser.write(chunk)
+            if collector.upload and collector.upload.size > settings.MAX_FILE_SIZE:
+                raise _file_too_large_error()
+            for data in collector.pending:
+                await collector.upload.write(data)
+            collector.pending.clear()
+        parser.finalize()
+    except MultipartParseError as e:
+        if collector.upload:
+            collector.upload.close()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Malformed multipart body: {str(e)}"
+        )
+    except Exception:
+        if collector.upload:
+            collector.upload.close()
+        raise
+
+    if collector.upload is None:
+        raise _missing_file_error(field_name)
+
+    collector.upload.file.seek(0)
+    return collector.upload
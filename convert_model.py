@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Convert the Keras model to ONNX for the onnxruntime backend (MODEL_BACKEND=onnx)
+Optionally applies dynamic INT8 quantization to the converted model
+"""
+
+import argparse
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import settings
+
+
+def convert(input_path, output_path, quantize=False, opset=13):
+    """Convert a Keras model file to ONNX, optionally quantized to INT8"""
+    import keras
+    import tensorflow as tf
+    import tf2onnx
+
+    model = keras.models.load_model(input_path)
+
+    # Same layout as ImageProcessor.preprocess_image, with a dynamic batch size
+    width, height = settings.get_model_input_size()
+    input_signature = (tf.TensorSpec((None, height, width), tf.float32, name="input"),)
+
+    fp32_path = f"{output_path}.fp32" if quantize else output_path
+    tf2onnx.convert.from_keras(
+        model,
+        input_signature=input_signature,
+        opset=opset,
+        output_path=fp32_path
+    )
+    print(f"✅ Converted {input_path} -> {fp32_path}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(fp32_path, output_path, weight_type=QuantType.QInt8)
+        os.remove(fp32_path)
+        print(f"✅ Quantized to INT8 -> {output_path}")
+
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the Keras model to ONNX")
+    parser.add_argument("--input", default=settings.get_model_path(),
+                       help="Keras model path (default: MODEL_PATH)")
+    parser.add_argument("--output", default=settings.get_onnx_model_path(),
+                       help="ONNX output path (default: ONNX_MODEL_PATH)")
+    parser.add_argument("--quantize", action="store_true",
+                       help="Apply dynamic INT8 quantization")
+    parser.add_argument("--opset", type=int, default=13,
+                       help="ONNX opset version")
+
+    args = parser.parse_args()
+
+    try:
+        convert(args.input, args.output, quantize=args.quantize, opset=args.opset)
+    except ImportError as e:
+        print(f"❌ Missing dependencies: {e}")
+        print("💡 Run: pip install tf2onnx onnxruntime")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
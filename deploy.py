@@ -5,42 +5,125 @@ Supports both local and Docker deployments with identical configuration
 """
 
 import argparse
+import functools
 import subprocess
+from pathlib import Path
 import sys
 import time
 import requests
 import os
 
 def run_command(cmd, shell=True):
-    """Run a command and return the result"""
+    """Run a command, echoing its combined output live, and return (success, "")"""
+    try:
+        proc = subprocess.Popen(
+            cmd, shell=shell, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, bufsize=1
+        )
+    except OSError as e:
+        return False, str(e)
+    
+    with proc:
+        for line in proc.stdout:
+            sys.stdout.write(line)
+        returncode = proc.wait()
+    
+    # Output has already been shown, so there is nothing left to return
+    return returncode == 0, ""
+
+def run_command_quiet(cmd, shell=True):
+    """Run a command and return its captured result, for short probes whose output is needed"""
     try:
         result = subprocess.run(cmd, shell=shell, capture_output=True, text=True, check=True)
         return True, result.stdout
     except subprocess.CalledProcessError as e:
         return False, e.stderr
 
+# Successful CLI version probes are reused across runs for this long
+PROBE_CACHE_DIR = Path.home() / ".cache" / "lung-cancer-deploy"
+PROBE_CACHE_TTL = 3600
+
+def cached_probe(name, cmd):
+    """Run a version probe, reusing a successful result cached on disk within PROBE_CACHE_TTL"""
+    cache_file = PROBE_CACHE_DIR / name
+    try:
+        if time.time() - cache_file.stat().st_mtime < PROBE_CACHE_TTL:
+            return True, cache_file.read_text()
+    except OSError:
+        pass
+    
+    success, output = run_command_quiet(cmd)
+    if success:
+        # Failures are not cached so a freshly installed CLI is picked up immediately
+        try:
+            PROBE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            cache_file.write_text(output)
+        except OSError:
+            pass
+    return success, output
+
+@functools.lru_cache(maxsize=1)
+def docker_version():
+    """Return (available, version output) for the docker CLI"""
+    return cached_probe("docker_version", "docker --version")
+
+@functools.lru_cache(maxsize=1)
+def docker_compose_version():
+    """Return (available, version output) for the docker compose v2 plugin"""
+    return cached_probe("docker_compose_version", "docker compose version")
+
 def check_api_health(url="http://127.0.0.1:8000/health", timeout=30):
-    """Check if the API is healthy"""
+    """Check if the API is healthy, polling with exponential backoff"""
     print(f"⏳ Checking API health at {url}...")
     
-    for i in range(timeout):
-        try:
-            response = requests.get(url, timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                print(f"✅ API is healthy! Status: {data.get('status')}")
-                return True
-        except:
-            pass
-        
-        if i < timeout - 1:  # Don't sleep on the last iteration
-            time.sleep(1)
+    deadline = time.monotonic() + timeout
+    attempt = 0
+    
+    with requests.Session() as session:
+        while True:
+            try:
+                # HEAD skips the response body; only the status code matters here
+                response = session.head(url, timeout=2, allow_redirects=False)
+                if response.status_code == 200:
+                    print("✅ API is healthy!")
+                    return True
+            except requests.RequestException:
+                pass
+            
+            # 0.05s, 0.1s, 0.2s, ... capped at 1s; the last sleep is shortened so one
+            # final probe lands at the deadline
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            delay = min(1.0, 0.05 * 2 ** attempt, remaining)
+            attempt += 1
+            time.sleep(delay)
     
     print("❌ API health check failed")
     return False
 
-def deploy_local():
-    """Deploy locally using Python"""
+def wait_for_container_health(name, timeout=60):
+    """Poll the container's Docker healthcheck status until it reports healthy"""
+    print(f"⏳ Waiting for container {name} to become healthy...")
+    
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        success, output = run_command_quiet(
+            f"docker inspect --format={{{{.State.Health.Status}}}} {name}"
+        )
+        status = output.strip() if success else ""
+        if status == "healthy":
+            print("✅ Container is healthy")
+            return True
+        if status == "unhealthy" or not success:
+            break
+        time.sleep(1)
+    
+    print(f"❌ Container did not become healthy (status: {status or 'unknown'})")
+    return False
+
+def deploy_local(reload=False):
+    """Deploy locally using Python (gunicorn workers, or a single reloading uvicorn with reload=True)"""
     print("🚀 Deploying FastAPI locally...")
     print("📋 Prerequisites:")
     print("   1. Anaconda environment activated")
@@ -72,15 +155,53 @@ def deploy_local():
     print("⏹️  Press Ctrl+C to stop the server")
     print("-" * 60)
     
-    # Run the server
+    # Prepare the model artifact once, rather than in every worker's startup
     try:
-        subprocess.run([
+        subprocess.run([sys.executable, "prewarm.py"], check=True)
+    except subprocess.CalledProcessError:
+        print("❌ Model prewarm failed")
+        return False
+    
+    # Same default as gunicorn.conf.py: every worker holds its own model copy
+    workers = os.environ.get("WEB_CONCURRENCY", "2")
+    
+    if reload:
+        # The file watcher re-imports the app on change and only works with a single worker process
+        cmd = [
             sys.executable, "-m", "uvicorn", 
             "app.main:app", 
             "--host", "0.0.0.0", 
             "--port", "8000", 
             "--reload"
-        ])
+        ]
+    else:
+        try:
+            import gunicorn  # noqa: F401
+            # Worker count, bind address and worker class come from gunicorn.conf.py
+            cmd = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app"]
+        except ImportError:
+            # gunicorn is not available on Windows; use uvicorn's own process manager
+            cmd = [
+                sys.executable, "-m", "uvicorn", 
+                "app.main:app", 
+                "--host", "0.0.0.0", 
+                "--port", "8000", 
+                "--workers", workers
+            ]
+        print(f"👷 Workers: {workers}")
+    
+    if os.name != "nt":
+        # Replace this process with the server so signals reach it directly; only returns on failure
+        sys.stdout.flush()
+        try:
+            os.execvp(cmd[0], cmd)
+        except OSError as e:
+            print(f"❌ Server failed to start: {e}")
+        return False
+    
+    # On Windows os.exec* spawns a detached child and exits, losing Ctrl+C, so block instead
+    try:
+        subprocess.run(cmd)
     except KeyboardInterrupt:
         print("\n👋 Server stopped by user")
     except Exception as e:
@@ -94,7 +215,7 @@ def deploy_docker():
     print("🐳 Deploying FastAPI with Docker...")
     
     # Check if Docker is available
-    success, output = run_command("docker --version")
+    success, output = docker_version()
     if not success:
         print("❌ Docker is not available")
         print("💡 Please install Docker Desktop")
@@ -104,22 +225,30 @@ def deploy_docker():
     
     # Build Docker image
     print("🔨 Building Docker image...")
-    success, output = run_command("docker build -t fastapi-lung-cancer .")
+    success, _ = run_command("docker build -t fastapi-lung-cancer .")
     if not success:
-        print(f"❌ Docker build failed: {output}")
+        print("❌ Docker build failed (see output above)")
         return False
     
     print("✅ Docker image built successfully")
     
-    # Stop and remove existing container
-    run_command("docker stop fastapi-container", shell=True)
-    run_command("docker rm fastapi-container", shell=True)
+    # Stop and remove existing container in a single CLI call
+    run_command_quiet("docker rm -f fastapi-container")
     
     # Run Docker container
     print("🏃 Starting Docker container...")
-    success, output = run_command(
-        "docker run -d -p 8000:8000 --name fastapi-container --env-file .env fastapi-lung-cancer"
+    # Same probe as the Dockerfile HEALTHCHECK, polled often so readiness is seen quickly
+    # (argument list rather than a shell string, so the nested quotes survive on any platform)
+    health_cmd = (
+        "python -c \"import requests; "
+        "requests.get('http://localhost:8000/health', timeout=2).raise_for_status()\""
     )
+    success, output = run_command_quiet([
+        "docker", "run", "-d", "-p", "8000:8000",
+        "--name", "fastapi-container", "--env-file", ".env",
+        "--health-cmd", health_cmd, "--health-interval=2s", "--health-retries=15",
+        "fastapi-lung-cancer"
+    ], shell=False)
     
     if not success:
         print(f"❌ Docker container failed to start: {output}")
@@ -128,11 +257,8 @@ def deploy_docker():
     container_id = output.strip()
     print(f"✅ Docker container started: {container_id[:12]}...")
     
-    # Wait for container to be ready
-    time.sleep(5)
-    
-    # Check if API is healthy
-    if check_api_health():
+    # Wait for the container healthcheck, then confirm from the host
+    if wait_for_container_health("fastapi-container") and check_api_health():
         print("🎉 Docker deployment successful!")
         print("📍 Server available at: http://127.0.0.1:8000")
         print("📖 API Documentation: http://127.0.0.1:8000/docs")
@@ -148,8 +274,8 @@ def deploy_docker_compose():
     """Deploy using Docker Compose"""
     print("🐳 Deploying FastAPI with Docker Compose...")
     
-    # Check if docker-compose is available
-    success, output = run_command("docker-compose --version")
+    # Check if docker compose is available
+    success, output = docker_compose_version()
     if not success:
         print("❌ Docker Compose is not available")
         return False
@@ -158,20 +284,18 @@ def deploy_docker_compose():
     
     # Stop existing services
     print("🛑 Stopping existing services...")
-    run_command("docker-compose down")
+    run_command("docker compose down")
     
     # Start services
     print("🚀 Starting services with Docker Compose...")
-    success, output = run_command("docker-compose up -d --build")
+    # --wait blocks until the service healthcheck passes, so no fixed sleep is needed
+    success, _ = run_command("docker compose up -d --build --wait --wait-timeout=60")
     
     if not success:
-        print(f"❌ Docker Compose deployment failed: {output}")
+        print("❌ Docker Compose deployment failed (see output above)")
         return False
     
-    print("✅ Docker Compose services started")
-    
-    # Wait for services to be ready
-    time.sleep(8)
+    print("✅ Docker Compose services started and healthy")
     
     # Check if API is healthy
     if check_api_health():
@@ -179,8 +303,8 @@ def deploy_docker_compose():
         print("📍 Server available at: http://127.0.0.1:8000")
         print("📖 API Documentation: http://127.0.0.1:8000/docs")
         print("🩺 Health Check: http://127.0.0.1:8000/health")
-        print("📋 View logs: docker-compose logs fastapi-lung-cancer")
-        print("⏹️  Stop services: docker-compose down")
+        print("📋 View logs: docker compose logs fastapi-lung-cancer")
+        print("⏹️  Stop services: docker compose down")
         return True
     else:
         print("❌ Docker Compose deployment failed - API not healthy")
@@ -196,8 +320,21 @@ def test_deployment():
     # Run test suite
     print("🏃 Running test suite...")
     try:
-        result = subprocess.run([sys.executable, "tests/test_api.py"], 
-                              capture_output=True, text=True)
+        cmd = [sys.executable, "-m", "pytest", "tests/test_api.py", "-q"]
+        
+        # Serial by default: each pytest-xdist worker re-imports the test dependencies and
+        # re-runs setup_class, which costs more than this small suite gains from overlap.
+        # Set TEST_WORKERS to spread a larger suite across workers
+        workers = int(os.environ.get("TEST_WORKERS", 0))
+        if workers > 0:
+            cmd += ["-n", str(workers)]
+        
+        # The health check above already confirmed readiness; the tests skip their own wait
+        os.environ["API_READY"] = "1"
+        result = subprocess.run(
+            cmd,
+            capture_output=True, text=True
+        )
         
         if result.returncode == 0:
             print("✅ All tests passed!")
@@ -205,6 +342,7 @@ def test_deployment():
             return True
         else:
             print("❌ Some tests failed:")
+            print(result.stdout)
             print(result.stderr)
             return False
             
@@ -220,6 +358,8 @@ def main():
                        help="Run tests after deployment")
     parser.add_argument("--no-health-check", action="store_true",
                        help="Skip health check")
+    parser.add_argument("--reload", "--dev", dest="reload", action="store_true", default=False,
+                       help="Local only: single uvicorn process with auto-reload (off by default)")
     
     args = parser.parse_args()
     
@@ -231,7 +371,7 @@ def main():
     # Deploy based on method
     success = False
     if args.method == "local":
-        success = deploy_local()
+        success = deploy_local(reload=args.reload)
     elif args.method == "docker":
         success = deploy_docker()
     elif args.method == "compose":
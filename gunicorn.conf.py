@@ -0,0 +1,17 @@
+"""
+Gunicorn configuration for the FastAPI Lung Cancer Detection API
+Runs uvicorn workers so concurrent requests are served by several processes
+"""
+
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Inference is CPU-bound and each worker loads its own copy of the model plus a
+# CPU-count inference pool, so default to a small fixed count rather than the
+# usual 2 * CPU + 1; raise WEB_CONCURRENCY on hosts with memory to spare
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+
+# Model loading happens during worker startup and can take a while
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Prepare the model artifact once before the server starts its workers
+With MODEL_BACKEND=onnx, (re)converts the Keras model when the ONNX file is
+missing or older, so each worker only has to open a ready-made session
+"""
+
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import settings
+
+
+def onnx_is_stale(keras_path, onnx_path):
+    """Whether the ONNX artifact is missing or older than the Keras model it came from"""
+    if not os.path.exists(onnx_path):
+        return True
+    return os.path.exists(keras_path) and os.path.getmtime(keras_path) > os.path.getmtime(onnx_path)
+
+
+def prewarm():
+    """Make sure the configured backend's model file is ready to load; return success"""
+    keras_path = settings.get_model_path()
+
+    if settings.MODEL_BACKEND == "onnx":
+        onnx_path = settings.get_onnx_model_path()
+        if onnx_is_stale(keras_path, onnx_path):
+            print(f"🔄 Converting {keras_path} to ONNX...")
+            from convert_model import convert
+
+            try:
+                convert(keras_path, onnx_path)
+            except ImportError as e:
+                print(f"❌ Missing dependencies: {e}")
+                print("💡 Run: pip install tf2onnx onnxruntime")
+                return False
+        else:
+            print(f"✅ ONNX model is up to date: {onnx_path}")
+
+        # Opening the session once here surfaces a broken artifact before any worker starts
+        from app.services.image_processor import get_image_processor
+
+        processor = get_image_processor()
+        processor.load()
+        if not processor.model_loaded:
+            print(f"❌ Failed to load ONNX model: {onnx_path}")
+            return False
+        print("✅ ONNX model loads cleanly")
+        return True
+
+    # Keras models cannot be shared across processes; each worker loads its own copy
+    if not os.path.exists(keras_path):
+        print(f"❌ Model file not found: {keras_path}")
+        return False
+    print(f"✅ Model file found: {keras_path}")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if prewarm() else 1)
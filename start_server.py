@@ -3,7 +3,6 @@
 Script to start FastAPI server for testing
 """
 
-import uvicorn
 import sys
 import os
 
@@ -18,10 +17,27 @@ if __name__ == "__main__":
     print("Press Ctrl+C to stop the server")
     print("-" * 60)
     
+    if os.name != "nt":
+        # Replace this process with the uvicorn CLI rather than keeping the launcher resident
+        # (reload stays off for testing)
+        cmd = [
+            sys.executable, "-m", "uvicorn",
+            "app.main:app",
+            "--app-dir", os.path.dirname(os.path.abspath(__file__)),
+            "--host", "127.0.0.1",
+            "--port", "8000",
+            "--log-level", "info"
+        ]
+        sys.stdout.flush()
+        os.execvp(cmd[0], cmd)
+    
+    # On Windows os.exec* spawns a detached child and exits, losing Ctrl+C, so run in-process
+    import uvicorn
+    
     uvicorn.run(
         "app.main:app",
         host="127.0.0.1",
         port=8000,
         reload=False,  # Disable reload for testing
         log_level="info"
-    )
\ No newline at end of file
+    )
@@ -5,13 +5,14 @@ Test script for FastAPI Lung Cancer Detection Microservice
 
 import pytest
 import requests
+from requests.adapters import HTTPAdapter
+from requests_toolbelt import MultipartEncoder
 import os
 import time
-import tempfile
 import io
-from pathlib import Path
 from PIL import Image
 import numpy as np
+import orjson
 
 # API Configuration
 API_BASE_URL = "http://127.0.0.1:8000"
@@ -19,6 +20,15 @@ HEALTH_ENDPOINT = f"{API_BASE_URL}/health"
 PREDICT_ENDPOINT = f"{API_BASE_URL}/predict"
 MODEL_INFO_ENDPOINT = f"{API_BASE_URL}/model/info"
 
+# Seeded PCG64 generator shared by the suite: faster than the legacy global
+# RandomState and deterministic
+_RNG = np.random.default_rng(seed=0)
+
+
+def jloads(response):
+    """Decode a JSON response body with orjson"""
+    return orjson.loads(response.content)
+
 
 class TestLungCancerAPI:
     """Test class for the Lung Cancer Detection API"""
@@ -26,56 +36,77 @@ class TestLungCancerAPI:
     @classmethod
     def setup_class(cls):
         """Setup test class"""
-        cls.test_image_path = None
+        cls.test_image_bytes = None
+        
+        # Shared keep-alive session so tests reuse connections
+        cls.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        cls.session.mount("http://", adapter)
+        
         cls.wait_for_api()
+        cls.create_test_image()
     
     @classmethod
     def teardown_class(cls):
         """Cleanup test class"""
-        if cls.test_image_path and os.path.exists(cls.test_image_path):
-            os.remove(cls.test_image_path)
+        cls.session.close()
     
     @classmethod
-    def wait_for_api(cls, max_retries=30):
-        """Wait for the API to become available"""
+    def wait_for_api(cls, timeout=30):
+        """Wait for the API to become available, polling with exponential backoff"""
+        # deploy.py sets API_READY after its own health check; don't poll a second time
+        if os.environ.get("API_READY") == "1":
+            return True
+        
         print("⏳ Waiting for API to become available...")
         
-        for i in range(max_retries):
+        deadline = time.monotonic() + timeout
+        attempt = 0
+        
+        while True:
             try:
-                response = requests.get(HEALTH_ENDPOINT, timeout=5)
+                response = cls.session.head(HEALTH_ENDPOINT, timeout=2, allow_redirects=False)
                 if response.status_code == 200:
                     print("✅ API is ready!")
                     return True
-            except:
+            except requests.RequestException:
                 pass
             
-            print(f"   Retry {i+1}/{max_retries}...")
-            time.sleep(1)
+            # 0.05s, 0.1s, 0.2s, ... capped at 1s; the last sleep is shortened so one
+            # final probe lands at the deadline
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            delay = min(1.0, 0.05 * 2 ** attempt, remaining)
+            attempt += 1
+            print(f"   Retry {attempt} in {delay:.2f}s...")
+            time.sleep(delay)
         
         raise Exception("❌ API did not become available in time")
     
-    def create_test_image(self):
-        """Create a test image for testing"""
-        if self.test_image_path is None:
-            # Create a temporary test image
-            test_array = np.random.randint(0, 256, (512, 512, 3), dtype=np.uint8)
+    @classmethod
+    def create_test_image(cls):
+        """Create the test image once per class and return its JPEG bytes"""
+        if cls.test_image_bytes is None:
+            test_array = _RNG.integers(0, 256, size=(512, 512, 3), dtype=np.uint8, endpoint=False)
             test_image = Image.fromarray(test_array)
             
-            # Save to temporary file
-            fd, self.test_image_path = tempfile.mkstemp(suffix='.jpg')
-            os.close(fd)
-            test_image.save(self.test_image_path, "JPEG")
+            # Encode in memory; no temporary file needed
+            buf = io.BytesIO()
+            # Skip the optimize pass: its Huffman re-scan buys nothing on noise
+            test_image.save(buf, "JPEG", quality=85, optimize=False, subsampling=2)
+            cls.test_image_bytes = buf.getvalue()
         
-        return self.test_image_path
+        return cls.test_image_bytes
     
     def test_health_check(self):
         """Test the health check endpoint"""
         print("🔍 Testing health check endpoint...")
         
-        response = requests.get(HEALTH_ENDPOINT, timeout=30)
+        response = self.session.get(HEALTH_ENDPOINT, timeout=30)
         assert response.status_code == 200
         
-        data = response.json()
+        data = jloads(response)
         assert "status" in data
         assert data["status"] == "healthy"
         assert "service" in data
@@ -88,10 +119,10 @@ class TestLungCancerAPI:
         """Test the model info endpoint"""
         print("🔍 Testing model info endpoint...")
         
-        response = requests.get(MODEL_INFO_ENDPOINT, timeout=30)
+        response = self.session.get(MODEL_INFO_ENDPOINT, timeout=30)
         assert response.status_code == 200
         
-        data = response.json()
+        data = jloads(response)
         assert "model_loaded" in data
         assert "supported_formats" in data
         assert "max_file_size_mb" in data
@@ -103,69 +134,65 @@ class TestLungCancerAPI:
         """Test successful image prediction"""
         print("🔍 Testing prediction endpoint...")
         
-        test_image_path = self.create_test_image()
+        test_image_bytes = self.create_test_image()
         
-        with open(test_image_path, 'rb') as f:
-            files = {'file': (os.path.basename(test_image_path), f, 'image/jpeg')}
-            
-            response = requests.post(PREDICT_ENDPOINT, files=files, timeout=60)
-            assert response.status_code == 200
-            
-            data = response.json()
-            
-            # Validate response structure
-            required_fields = [
-                'status', 'filename', 'image_info', 'prediction_result', 'message'
-            ]
-            for field in required_fields:
-                assert field in data, f"Missing field: {field}"
-            
-            # Validate image_info structure
-            image_info = data['image_info']
-            assert 'width' in image_info
-            assert 'height' in image_info
-            assert isinstance(image_info['width'], int)
-            assert isinstance(image_info['height'], int)
-            
-            # Validate prediction_result structure
-            prediction_result = data['prediction_result']
-            assert 'prediction' in prediction_result
-            assert 'confidence' in prediction_result
-            assert isinstance(prediction_result['confidence'], (int, float))
-            assert 0.0 <= prediction_result['confidence'] <= 1.0
-            
-            print(f"✅ Prediction successful: {data['prediction_result']}")
+        # MultipartEncoder frames the body on the fly instead of buffering a full copy
+        encoder = MultipartEncoder(
+            fields={'file': ('test.jpg', io.BytesIO(test_image_bytes), 'image/jpeg')}
+        )
+        
+        response = self.session.post(
+            PREDICT_ENDPOINT,
+            data=encoder,
+            headers={'Content-Type': encoder.content_type},
+            timeout=60
+        )
+        assert response.status_code == 200
+        
+        data = jloads(response)
+        
+        # Validate response structure
+        required_fields = [
+            'status', 'filename', 'image_info', 'prediction_result', 'message'
+        ]
+        for field in required_fields:
+            assert field in data, f"Missing field: {field}"
+        
+        # Validate image_info structure
+        image_info = data['image_info']
+        assert 'width' in image_info
+        assert 'height' in image_info
+        assert isinstance(image_info['width'], int)
+        assert isinstance(image_info['height'], int)
+        
+        # Validate prediction_result structure
+        prediction_result = data['prediction_result']
+        assert 'prediction' in prediction_result
+        assert 'confidence' in prediction_result
+        assert isinstance(prediction_result['confidence'], (int, float))
+        assert 0.0 <= prediction_result['confidence'] <= 1.0
+        
+        print(f"✅ Prediction successful: {data['prediction_result']}")
     
     def test_prediction_invalid_file_type(self):
         """Test prediction with invalid file type"""
         print("🔍 Testing with invalid file type...")
         
-        # Create a text file
-        fd, invalid_file_path = tempfile.mkstemp(suffix='.txt')
-        try:
-            with os.fdopen(fd, 'w') as f:
-                f.write("This is not an image file")
-            
-            with open(invalid_file_path, 'rb') as f:
-                files = {'file': ('test.txt', f, 'text/plain')}
-                
-                response = requests.post(PREDICT_ENDPOINT, files=files, timeout=30)
-                assert response.status_code == 400
-                
-                data = response.json()
-                assert "error" in data["status"] or "Invalid" in data.get("detail", "")
-                
-            print("✅ Invalid file type correctly rejected")
-        
-        finally:
-            if os.path.exists(invalid_file_path):
-                os.remove(invalid_file_path)
+        files = {'file': ('test.txt', io.BytesIO(b"This is not an image file"), 'text/plain')}
+        
+        response = self.session.post(PREDICT_ENDPOINT, files=files, timeout=30)
+        assert response.status_code == 400
+        
+        data = jloads(response)
+        assert "error" in data["status"] or "Invalid" in data.get("detail", "")
+        
+        print("✅ Invalid file type correctly rejected")
     
     def test_prediction_no_file(self):
         """Test prediction without file"""
         print("🔍 Testing without file...")
         
-        response = requests.post(PREDICT_ENDPOINT, timeout=30)
+        response = self.session.post(PREDICT_ENDPOINT, timeout=30)
         assert response.status_code == 422  # Validation error
         
         print("✅ No file correctly rejected")
@@ -174,28 +201,98 @@ class TestLungCancerAPI:
         """Test prediction with empty file"""
         print("🔍 Testing with empty file...")
         
-        # Create an empty file
-        fd, empty_file_path = tempfile.mkstemp(suffix='.jpg')
-        try:
-            os.close(fd)  # Close the file descriptor, leaving empty file
-            
-            # Read the empty file and send it
-            with open(empty_file_path, 'rb') as f:
-                file_content = f.read()  # This will be empty bytes
+        files = {'file': ('empty.jpg', io.BytesIO(b""), 'image/jpeg')}
+        response = self.session.post(PREDICT_ENDPOINT, files=files, timeout=30)
+        
+        # Empty file should be treated as a bad request
+        assert response.status_code == 400
+        
+        print("✅ Empty file correctly rejected")
+    
+    def test_prediction_file_too_large(self):
+        """Test prediction with a file over the configured size limit"""
+        print("🔍 Testing with oversized file...")
+        
+        info = jloads(self.session.get(MODEL_INFO_ENDPOINT, timeout=30))
+        max_file_size = int(info["max_file_size_mb"] * 1024 * 1024)
+        
+        # Content-Length already over the limit: rejected before the body is read
+        payload = io.BytesIO(b"\0" * (max_file_size + 1024 * 1024))
+        files = {'file': ('large.jpg', payload, 'image/jpeg')}
+        response = self.session.post(PREDICT_ENDPOINT, files=files, timeout=60)
+        assert response.status_code == 413
+        
+        # Chunked bodies without Content-Length: rejected once the streamed bytes pass the limit
+        def chunked_body(part_headers, size, chunk_size=1024 * 1024):
+            yield b'--test-boundary\r\n' + part_headers + b'\r\n\r\n'
+            while size > 0:
+                yield b"\0" * min(chunk_size, size)
+                size -= chunk_size
+            yield b'\r\n--test-boundary--\r\n'
+        
+        bodies = [
+            # Oversized file part
+            chunked_body(
+                b'Content-Disposition: form-data; name="file"; filename="large.jpg"\r\n'
+                b'Content-Type: image/jpeg',
+                max_file_size + 1
+            ),
+            # Oversized non-file field, which the file size check alone never sees
+            chunked_body(
+                b'Content-Disposition: form-data; name="notes"',
+                max_file_size + 1024 * 1024
+            ),
+        ]
+        for body in bodies:
+            response = self.session.post(
+                PREDICT_ENDPOINT,
+                data=body,
+                headers={'Content-Type': 'multipart/form-data; boundary=test-boundary'},
+                timeout=60
+            )
+            assert response.status_code == 413
             
-            # Use requests with data instead of files parameter for empty file
-            files = {'file': ('empty.jpg', io.BytesIO(file_content), 'image/jpeg')}
-            response = requests.post(PREDICT_ENDPOINT, files=files, timeout=30)
+            data = jloads(response)
+            assert "File too large" in data["error_message"]
+        
+        print("✅ Oversized file correctly rejected")
+    
+    def test_prediction_malformed_multipart(self):
+        """Test prediction with a body that is not valid multipart data"""
+        print("🔍 Testing with malformed multipart body...")
+        
+        response = self.session.post(
+            PREDICT_ENDPOINT,
+            data=b"this is not a multipart body",
+            headers={'Content-Type': 'multipart/form-data; boundary=test-boundary'},
+            timeout=30
+        )
+        assert response.status_code == 400
+        
+        data = jloads(response)
+        assert "Malformed multipart body" in data["error_message"]
+        
+        print("✅ Malformed multipart body correctly rejected")
+    
+    def test_prediction_image_too_large(self):
+        """Test prediction with an image whose dimensions exceed MAX_IMAGE_PIXELS"""
+        print("🔍 Testing with oversized image dimensions...")
+        
+        # Blank 1-bit images compress to a few KB; dimensions assume the default 50M pixel limit.
+        # 8000x8000 is caught by the exact limit check, 12000x12000 by PIL's decompression bomb error
+        for size in [(8000, 8000), (12000, 12000)]:
+            buf = io.BytesIO()
+            Image.new("1", size).save(buf, "PNG")
+            buf.seek(0)
             
-            # Empty file should be treated as a bad request
+            files = {'file': ('large.png', buf, 'image/png')}
+            response = self.session.post(PREDICT_ENDPOINT, files=files, timeout=60)
             assert response.status_code == 400
-                
-            print("✅ Empty file correctly rejected")
+            
+            data = jloads(response)
+            assert "Image too large" in data["error_message"]
         
-        finally:
-            if os.path.exists(empty_file_path):
-                os.remove(empty_file_path)
-
+        print("✅ Oversized image correctly rejected")
 
 def run_tests():
     """Run all tests manually (without pytest)"""
@@ -212,7 +309,10 @@ def run_tests():
         test_instance.test_prediction_success,
         test_instance.test_prediction_invalid_file_type,
         test_instance.test_prediction_no_file,
-        test_instance.test_prediction_empty_file
+        test_instance.test_prediction_empty_file,
+        test_instance.test_prediction_file_too_large,
+        test_instance.test_prediction_malformed_multipart,
+        test_instance.test_prediction_image_too_large
     ]
     
     results = []